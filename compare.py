@@ -1,40 +1,57 @@
 import csv
+import hashlib
 
-def read_csv(file_path):
+def row_fingerprint(row):
     """
-    Reads a CSV file and returns its content as a list of dictionaries.
-    
+    Returns a 128-bit BLAKE2 digest of a row, so the lookup set holds small fixed-size keys
+    however wide the CSV is.
+
+    :param row: List of field values
+    :return: 16-byte digest
+    """
+    return hashlib.blake2b("\x1f".join(row).encode('utf-8'), digest_size=16).digest()
+
+def read_row_fingerprints(file_path):
+    """
+    Streams a CSV file and returns the fingerprints of its data rows.
+
     :param file_path: Path to the CSV file
-    :return: List of rows (dictionaries)
+    :return: Set of row fingerprints, header excluded
     """
     with open(file_path, mode='r', newline='', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        return [row for row in reader]
+        reader = csv.reader(file)
+        next(reader, None)  # Skip the header
+        return {row_fingerprint(row) for row in reader if row}
 
-def compare_csv(csv1_data, csv2_data):
+def compare_csv(csv1_path, csv2_path):
     """
-    Compares two CSV datasets and returns rows present in the first CSV but not in the second.
+    Streams the first CSV and yields the rows that are not present in the second CSV.
+
+    Only the second file is held in memory, as a set of row fingerprints; rows are compared
+    by their values, so both files are expected to share the same header.
 
-    :param csv1_data: List of rows (dictionaries) from the first CSV
-    :param csv2_data: List of rows (dictionaries) from the second CSV
-    :return: List of rows in csv1_data not found in csv2_data
+    :param csv1_path: Path to the first CSV file
+    :param csv2_path: Path to the second CSV file
+    :return: Generator of rows (dictionaries) from the first CSV not found in the second
     """
-    # Convert rows to tuples for comparison
-    csv2_set = {tuple(row.items()) for row in csv2_data}
-    return [row for row in csv1_data if tuple(row.items()) not in csv2_set]
+    csv2_set = read_row_fingerprints(csv2_path)
+    with open(csv1_path, mode='r', newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        for row in reader:
+            if row and row_fingerprint(row) not in csv2_set:
+                yield dict(zip(header, row))
 
 # Example usage
 csv1_path = "file1.csv"
 csv2_path = "file2.csv"
 
-csv1_data = read_csv(csv1_path)
-csv2_data = read_csv(csv2_path)
-
-rows_not_in_csv2 = compare_csv(csv1_data, csv2_data)
+found = False
+for row in compare_csv(csv1_path, csv2_path):
+    if not found:
+        print("Rows in first CSV but not in second CSV:")
+        found = True
+    print(row)
 
-if rows_not_in_csv2:
-    print("Rows in first CSV but not in second CSV:")
-    for row in rows_not_in_csv2:
-        print(row)
-else:
+if not found:
     print("All rows from the first CSV are present in the second CSV.")
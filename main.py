@@ -1,10 +1,29 @@
 import asyncio
-from typing import List
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, List, Optional
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from pymongo import MongoClient
-import requests
-from bs4 import BeautifulSoup
+from pymongo import AsyncMongoClient, ReplaceOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, PyMongoError
+import aiohttp
+from cachetools import LRUCache, TTLCache
+import lxml.html
+from lxml import etree
+
+# Logging: parse misses are DEBUG, failed scrapes and saves WARNING and up. LOG_LEVEL
+# applies to the scraper's own loggers; libraries stay at WARNING.
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "WARNING").upper()
+logging.basicConfig()
+logger = logging.getLogger(__name__)
+logger.setLevel(LOG_LEVEL)
 
 # MongoDB Configuration
 MONGO_URI = "mongodb://localhost:27017"
@@ -13,567 +32,761 @@ STOCK_COLLECTION_NAME = "stocks"
 STOCK_DETAILS_COLLECTION = "stock_details_21_03"
 # STOCK_DETAILS_COLLECTION = "updated_stock_details"
 EQUITY_LIST = "equity_list_nse"
+SCRAPE_CACHE_COLLECTION = "scrape_cache"
+MONGO_POOL_SIZE = 50
 
 # Connect to MongoDB
-client = MongoClient(MONGO_URI)
+client = AsyncMongoClient(MONGO_URI, maxPoolSize=MONGO_POOL_SIZE)
 db = client[DATABASE_NAME]
 stock_collection = db[STOCK_COLLECTION_NAME]
 stock_details_collection = db[STOCK_DETAILS_COLLECTION]
 equity_list = db[EQUITY_LIST]
+scrape_cache_collection = db[SCRAPE_CACHE_COLLECTION]
+
+# Scraper Configuration
+MAX_CONCURRENT_SCRAPES = 8  # Stocks scraped at the same time
+MAX_CONNECTIONS = 64
+MAX_CONNECTIONS_PER_HOST = 8
+DNS_CACHE_TTL = 300  # Seconds
+KEEPALIVE_TIMEOUT = 300  # Seconds an idle connection stays open for reuse
+REQUEST_TIMEOUT = 10  # Seconds
+CONNECT_TIMEOUT = 5  # Seconds, so an unreachable host fails fast and gets retried
+USER_AGENT = "Mozilla/5.0"
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5  # Seconds, doubled after every failed attempt
+RETRY_STATUSES = {429, 503}  # Responses retried after the server's Retry-After delay
+MAX_RETRY_DELAY = 60  # Seconds, cap on a server requested delay
+MAX_REQUESTS_PER_MINUTE = 10  # Outgoing requests to screener.in; cache hits are not counted
+REQUEST_BURST = 10  # Requests that may go out at once before pacing kicks in
+PAGE_CACHE_SIZE = 512  # Parsed pages kept in memory
+PAGE_CACHE_TTL = 300  # Seconds
+VALIDATED_PAGE_CACHE_SIZE = 4096  # Expired pages kept for conditional revalidation
+SCRAPE_CACHE_TTL = 7 * 24 * 3600  # Seconds a page's stored parse is kept in scrape_cache
+# Output version of parse_consolidated_page; 2 is {"documents": ..., "warehouse_id": ...}
+CONSOLIDATED_PAGE_VERSION = 2
+SYMBOL_PAGE_SIZE = 500  # Symbols per /get-stock-symbols-limited page
+SYMBOL_BATCH_SIZE = 1000  # Symbols read per cursor batch and sent per response chunk
+WRITE_QUEUE_SIZE = 1024  # Scraped stocks waiting to be saved
+WRITE_BATCH_SIZE = 500  # Stocks saved per bulk write
+WRITE_FLUSH_INTERVAL = 0.1  # Seconds a partial batch waits for more stocks
+PARSE_WORKERS = os.cpu_count()  # Processes parsing pages in parallel
+
+# Shared HTTP session, opened on startup so every scrape reuses its connection pool
+# (responses are compressed: aiohttp asks for gzip/deflate, plus br with Brotli installed)
+http_session: aiohttp.ClientSession = None
+
+# Process pool that parses pages off the event loop and outside the GIL
+parse_executor: ProcessPoolExecutor = None
+
+# Scraped stocks waiting for the single writer task, both created on startup
+write_queue: asyncio.Queue = None
+writer_task: asyncio.Task = None
+
+# Recently parsed pages keyed by URL, so repeat scrapes skip the download and parse
+page_cache = TTLCache(maxsize=PAGE_CACHE_SIZE, ttl=PAGE_CACHE_TTL)
+
+# Parsed pages with their ETag / Last-Modified, revalidated with a conditional GET once
+# they drop out of page_cache. Backed by the scrape_cache collection across restarts.
+validated_pages = LRUCache(maxsize=VALIDATED_PAGE_CACHE_SIZE)
+
+# Response validator -> the request header that sends it back
+CONDITIONAL_HEADERS = {"ETag": "If-None-Match", "Last-Modified": "If-Modified-Since"}
+
+
+async def open_http_session():
+    global http_session
+    http_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=MAX_CONNECTIONS,
+            limit_per_host=MAX_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ),
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT, sock_connect=CONNECT_TIMEOUT),
+        headers={"User-Agent": USER_AGENT},
+    )
+
+
+async def start_parse_executor():
+    global parse_executor
+    parse_executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+
+
+async def dedupe_stock_details() -> int:
+    """
+    Keeps only the newest document per stock_symbol, so the unique index can be
+    built on a collection that was filled before it existed.
+    """
+    removed = 0
+    duplicates = await stock_details_collection.aggregate([
+        {"$sort": {"_id": -1}},
+        {"$group": {"_id": "$stock_symbol", "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ])
+    async for group in duplicates:
+        result = await stock_details_collection.delete_many({"_id": {"$in": group["ids"][1:]}})
+        removed += result.deleted_count
+    return removed
+
+
+async def create_unique_symbol_index():
+    # One document per stock, so re-scraping replaces it instead of adding a duplicate
+    try:
+        await stock_details_collection.create_index([("stock_symbol", 1)], unique=True)
+    except (DuplicateKeyError, OperationFailure) as error:
+        if getattr(error, "code", None) != 11000:
+            raise
+        removed = await dedupe_stock_details()
+        logger.warning("Removed %d duplicate stock_details documents before building the stock_symbol index", removed)
+        await stock_details_collection.create_index([("stock_symbol", 1)], unique=True)
 
-# FastAPI app
-app = FastAPI()
 
+async def create_indexes():
+    """
+    Index failures are logged instead of raised, so the API still starts when
+    MongoDB is down or an index cannot be built; the endpoints then fail per request.
+    """
+    try:
+        # Lets the symbol endpoints read SYMBOL straight from the index
+        await equity_list.create_index("SYMBOL")
+        await create_unique_symbol_index()
+        # Stored parses expire, so scrape_cache does not keep every URL ever scraped
+        await scrape_cache_collection.create_index("stored_at", expireAfterSeconds=SCRAPE_CACHE_TTL)
+    except PyMongoError as error:
+        logger.error("Could not create MongoDB indexes: %s", error)
 
-# Pydantic Models
-class StockList(BaseModel):
-    stock_symbols: str  # Comma-separated stock symbols
 
+async def start_writer():
+    global write_queue, writer_task
+    write_queue = asyncio.Queue(maxsize=WRITE_QUEUE_SIZE)
+    writer_task = asyncio.create_task(write_stock_details())
 
-# Helper Functions
-def fetch_page(url: str) -> BeautifulSoup:
-    """
-    Fetch and parse a webpage.
-    """
-    response = requests.get(url)
-    if response.status_code == 200:
-        return BeautifulSoup(response.text, "html.parser")
-    raise HTTPException(status_code=404, detail=f"Failed to fetch page: {url}")
 
+async def stop_writer():
+    # Save whatever is still queued before the app exits, unless the writer has died
+    drained = asyncio.create_task(write_queue.join())
+    await asyncio.wait({drained, writer_task}, return_when=asyncio.FIRST_COMPLETED)
+    drained.cancel()
+    if writer_task.done() and not writer_task.cancelled() and writer_task.exception():
+        logger.error("Stock writer stopped with unsaved stocks: %s", writer_task.exception())
+    writer_task.cancel()
 
-def parse_ul_top_ratios(stock_symbol: str, soup: BeautifulSoup):
-    """
-    Parse the <ul> with id="top-ratios" from the page.
-    """
-    ul_element = soup.find("ul", id="top-ratios")
-    if not ul_element:
-        return None
 
-    items_dict = {}
-    for li in ul_element.find_all("li"):
-        name_span = li.find("span", class_="name")
-        value_span = li.find("span", class_="value")
-        if name_span and value_span:
-            key = name_span.get_text(strip=True)
-            value = value_span.get_text(strip=True)
-            items_dict[key] = value
+async def close_mongo_client():
+    await client.close()
 
-    return {"stock_symbol": stock_symbol, "stock_details": items_dict}
 
+async def close_http_session():
+    await http_session.close()
 
-def parse_shareholder_table(stock_symbol: str, soup: BeautifulSoup):
+
+async def stop_parse_executor():
+    parse_executor.shutdown()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_http_session()
+    await start_parse_executor()
+    await create_indexes()
+    await start_writer()
+    try:
+        yield
+    finally:
+        await stop_writer()
+        await close_mongo_client()
+        await close_http_session()
+        await stop_parse_executor()
+
+
+# FastAPI app
+app = FastAPI(lifespan=lifespan)
+
+
+class RateLimiter:
     """
-    Parse the shareholder table with id="quarterly-shp".
+    Token bucket holding up to `burst` requests, refilled at `rate` per second.
+    When it is empty, callers reserve the next tokens in turn, so requests queue
+    up evenly. A pause empties the bucket for that long, so one Retry-After holds
+    off the whole scrape.
     """
-    table = soup.find("div", id="quarterly-shp")
-    if not table:
-        return None
 
-    headers = [th.text.strip() for th in table.find("thead").find("tr").find_all("th")]
-    rows = []
-    for tr in table.find("tbody").find_all("tr"):
-        row_data = {
-            headers[idx]: cell.get_text(strip=True)
-            for idx, cell in enumerate(tr.find_all("td"))
-        }
-        rows.append(row_data)
+    def __init__(self, rate: float, burst: int):
+        self.interval = 1 / rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = None
 
-    return {"shareholder_data": rows}
+    def refill(self, now: float):
+        if self.updated is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.interval)
+        self.updated = now
 
+    async def wait(self):
+        self.refill(asyncio.get_running_loop().time())
+        # Tokens below zero are reservations by requests already waiting
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens * self.interval)
 
-def parse_profit_loss_table(stock_symbol: str, soup: BeautifulSoup):
-    try:
-        table = soup.find("section", id="profit-loss")
-        # table = soup.find("div", id="peers-table-placeholder")
-        if not table:
-            print(f"No table placeholder found for {stock_symbol}.")
-            return {"profit_loss": []}
+    def pause(self, seconds: float):
+        self.refill(asyncio.get_running_loop().time())
+        # The next free token comes due when the pause ends, or later if already reserved
+        self.tokens = min(self.tokens, 1 - seconds / self.interval)
 
-        # Find the table within the placeholder
-        data_table = table.find("table", class_="data-table")
-        if not data_table:
-            print(f"No data table found for {stock_symbol}.")
-            return {"profit_loss": []}
 
-        # Extract headers
-        headers = []
-        header_row = data_table.find("tr")
-        if not header_row:
-            print(f"No header row found for {stock_symbol}.")
-            return {"profit_loss": []}
+rate_limiter = RateLimiter(MAX_REQUESTS_PER_MINUTE / 60, REQUEST_BURST)
 
-        for th in header_row.find_all("th"):
-            headers.append(th.get_text(strip=True))
 
-        if not headers:
-            print(f"No headers found for {stock_symbol}.")
-            return {"profit_loss": []}
+# Pydantic Models
+class StockList(BaseModel):
+    stock_symbols: str  # Comma-separated stock symbols
 
-        # Extract rows
-        rows = []
-        tbody = data_table.find("tbody")
-        if not tbody:
-            print(f"No tbody found for {stock_symbol}.")
-            return {"profit_loss": []}
-
-        for tr in tbody.find_all("tr"):
-            cells = tr.find_all("td")
-            if len(cells) != len(headers):
-                print(f"Row mismatch for {stock_symbol}: {cells}")
-                continue
 
-            # Map headers to cell values
-            row_data = {
-                headers[idx]: cell.get_text(strip=True)
-                for idx, cell in enumerate(cells)
-            }
-            rows.append(row_data)
+# Response models let FastAPI serialize straight to JSON bytes through pydantic
+class ScrapeResult(BaseModel):
+    stock_symbol: str
+    message: Optional[str] = None
+    error: Optional[str] = None
 
-        if not rows:
-            print(f"No data rows found for {stock_symbol}.")
-            return {"profit_loss": []}
 
-        return {"profit_loss": rows}
-    except Exception as e:
-        print(f"Error parsing peer comparison table for {stock_symbol}: {str(e)}")
-        return {"profit_loss": []}
+class ScrapeResults(BaseModel):
+    results: List[ScrapeResult]
 
 
-def parse_balance_sheet_table(stock_symbol: str, soup: BeautifulSoup):
-    try:
-        table = soup.find("section", id="balance-sheet")
-        # table = soup.find("div", id="peers-table-placeholder")
-        if not table:
-            print(f"No table placeholder found for {stock_symbol}.")
-            return {"balance_sheet": []}
+class SymbolList(BaseModel):
+    symbols: Optional[str] = None  # Comma-separated stock symbols
+    last_symbol: Optional[str] = None
+    error: Optional[str] = None
 
-        # Find the table within the placeholder
-        data_table = table.find("table", class_="data-table")
-        if not data_table:
-            print(f"No data table found for {stock_symbol}.")
-            return {"balance_sheet": []}
 
-        # Extract headers
-        headers = []
-        header_row = data_table.find("tr")
-        if not header_row:
-            print(f"No header row found for {stock_symbol}.")
-            return {"balance_sheet": []}
+# Helper Functions
+# One NSE symbol, e.g. TCS, M&M or BAJAJ-AUTO
+SYMBOL_PATTERN = re.compile(r"[A-Z0-9.&-]+")
+SYMBOL_SEPARATOR = re.compile(r"\s*,\s*")
 
-        for th in header_row.find_all("th"):
-            headers.append(th.get_text(strip=True))
 
-        if not headers:
-            print(f"No headers found for {stock_symbol}.")
-            return {"balance_sheet": []}
+def parse_symbols(stock_symbols: str) -> List[str]:
+    """
+    Split a comma-separated symbol list into upper-cased symbols, dropping
+    surrounding whitespace, empty entries and repeats (first occurrence wins).
+    Entries that are not a valid symbol are rejected with a 422 instead of guessed at.
+    """
+    symbols = [symbol for symbol in SYMBOL_SEPARATOR.split(stock_symbols.strip().upper()) if symbol]
+    invalid = [symbol for symbol in symbols if not SYMBOL_PATTERN.fullmatch(symbol)]
+    if invalid:
+        raise HTTPException(status_code=422, detail=f"Invalid stock symbols: {', '.join(invalid)}")
+    return list(dict.fromkeys(symbols))
+
+
+# XPath predicate matching one token of the class attribute, like BeautifulSoup's class_=
+HAS_CLASS = 'contains(concat(" ", normalize-space(@class), " "), " {} ")'
+
+# screener.in always serves UTF-8, so the parser is told so instead of sniffing the bytes
+HTML_ENCODING = "utf-8"
+HTML_PARSER = lxml.html.HTMLParser(encoding=HTML_ENCODING)
+STREAM_CHUNK_SIZE = 64 * 1024  # Bytes fed to the pull parser at a time
+
+# XPath expressions compiled once at import and reused for every page
+SECTIONS_WITH_ID = etree.XPath(".//section[@id]")
+DATA_TABLE = etree.XPath(f".//table[{HAS_CLASS.format('data-table')}]")
+NAME_SPAN = f"span[{HAS_CLASS.format('name')}]"
+VALUE_SPAN = f"span[{HAS_CLASS.format('value')}]"
+# First name and value span of every <li> that has both, in a single pass each
+RATIO_ITEM = f"li[.//{NAME_SPAN} and .//{VALUE_SPAN}]"
+RATIO_NAMES = etree.XPath(f"{RATIO_ITEM}/descendant::{NAME_SPAN}[1]")
+RATIO_VALUES = etree.XPath(f"{RATIO_ITEM}/descendant::{VALUE_SPAN}[1]")
+# Document lists of the consolidated page, matched on their full class attribute
+DOCUMENTS_SECTION = etree.XPath('.//div[@class=concat("documents ", $kind, " flex-column")]')
+# First <a> of every annual report <li>, when it has a link
+ANNUAL_REPORT_LINKS = etree.XPath(
+    '(.//div[@class="documents annual-reports flex-column"])[1]//li/descendant::a[1][@href != ""]'
+)
+CONCALL_ITEMS = etree.XPath(f".//li[{HAS_CLASS.format('flex')}]")
+CONCALL_DATE = etree.XPath(f".//div[{HAS_CLASS.format('ink-600')}]")
+CONCALL_LINKS = etree.XPath(f".//a[{HAS_CLASS.format('concall-link')}]")
+CONCALL_NOTES = etree.XPath(f".//button[{HAS_CLASS.format('concall-link')}]")
+
+# <div id="company-info" data-warehouse-id="..."> of a company page, read off the raw bytes
+WAREHOUSE_ID = re.compile(rb'data-warehouse-id="(\d+)"')
+
+EMPTY_DOCUMENTS = {"annual_reports": [], "credit_ratings": [], "scrape_concalls": []}
+
+# Ids of the two sections a company page is saved for, looked up in the raw bytes so
+# pages without either (redirects, error pages) skip the parse
+COMPANY_PAGE_MARKERS = (b"top-ratios", b"quarterly-shp")
+
+
+def rate_limit_reset(headers) -> Optional[float]:
+    """
+    Seconds until the server's rate limit window resets, when its
+    X-RateLimit-Remaining header says no requests are left, else None.
+    """
+    if headers.get("X-RateLimit-Remaining", "").strip() != "0":
+        return None
+    try:
+        reset = float(headers.get("X-RateLimit-Reset", ""))
+    except ValueError:
+        return None
+    # Sent either as seconds left in the window or as a Unix timestamp
+    if reset > 10**9:
+        reset -= datetime.now(timezone.utc).timestamp()
+    return min(max(reset, 0.0), MAX_RETRY_DELAY)
 
-        # Extract rows
-        rows = []
-        tbody = data_table.find("tbody")
-        if not tbody:
-            print(f"No tbody found for {stock_symbol}.")
-            return {"balance_sheet": []}
-
-        for tr in tbody.find_all("tr"):
-            cells = tr.find_all("td")
-            if len(cells) != len(headers):
-                print(f"Row mismatch for {stock_symbol}: {cells}")
-                continue
 
-            # Map headers to cell values
-            row_data = {
-                headers[idx]: cell.get_text(strip=True)
-                for idx, cell in enumerate(cells)
-            }
-            rows.append(row_data)
+def retry_delay(response: aiohttp.ClientResponse, attempt: int) -> float:
+    """
+    Seconds to wait before retrying a throttled response, from its Retry-After
+    or X-RateLimit-Reset header when present, else exponential backoff.
+    """
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        if retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_DELAY)
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+            delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+            return min(max(delay, 0.0), MAX_RETRY_DELAY)
+        except (TypeError, ValueError):
+            pass
+    reset = rate_limit_reset(response.headers)
+    if reset is not None:
+        return reset
+    return RETRY_BACKOFF * 2**attempt
+
+
+async def fetch(url: str, headers: dict = None) -> tuple:
+    """
+    GET a URL on the shared session and return its (status, body bytes, headers).
+    Requests go through the rate limiter, which also holds off until the rate
+    limit window resets once the server reports none left; connection errors are
+    retried with exponential backoff and 429/503 responses after their Retry-After delay.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        await rate_limiter.wait()
+        try:
+            async with http_session.get(url, headers=headers) as response:
+                reset = rate_limit_reset(response.headers)
+                if reset is not None:
+                    rate_limiter.pause(reset)
+                if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    return response.status, await response.read(), response.headers
+                rate_limiter.pause(retry_delay(response, attempt))
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt == MAX_RETRIES:
+                raise
+            await asyncio.sleep(RETRY_BACKOFF * 2**attempt)
+
+
+async def fetch_page(url: str, headers: dict = None) -> tuple:
+    """
+    Fetch a webpage and return its (status, body, headers). A 304 Not Modified
+    answer to a conditional request counts as a success.
+    """
+    status, body, response_headers = await fetch(url, headers=headers)
+    if status in (200, 304):
+        return status, body, response_headers
+    raise HTTPException(status_code=404, detail=f"Failed to fetch page: {url}")
 
-        if not rows:
-            print(f"No data rows found for {stock_symbol}.")
-            return {"balance_sheet": []}
 
-        return {"balance_sheet": rows}
-    except Exception as e:
-        print(f"Error parsing peer comparison table for {stock_symbol}: {str(e)}")
-        return {"balance_sheet": []}
+async def load_validated_page(url: str, parser: str, version: int) -> tuple:
+    """
+    Return the stored (validators, parsed result) of a page, or ({}, None) if there is
+    none or it was produced by another parser or parser version.
+    """
+    doc = await scrape_cache_collection.find_one({"_id": url, "parser": parser, "version": version})
+    if doc is None:
+        return {}, None
+    return doc["validators"], doc["data"]
 
 
-def parse_quaterly_result_table(stock_symbol: str, soup: BeautifulSoup):
+async def store_validated_page(url: str, parser: str, version: int, validators: dict, data: dict):
+    """
+    Persist a page's validators and parsed result for later conditional GETs, tagged
+    with the parser that produced it. The cache is best-effort: a failed write is
+    logged and the scrape goes on with the fresh result.
+    """
+    try:
+        await scrape_cache_collection.replace_one(
+            {"_id": url},
+            {
+                "parser": parser,
+                "version": version,
+                "validators": validators,
+                "data": data,
+                "stored_at": datetime.now(timezone.utc),
+            },
+            upsert=True,
+        )
+    except PyMongoError as error:
+        logger.warning("Could not store %s in scrape_cache: %s", url, error)
+
+
+async def touch_validated_page(url: str):
+    """
+    Restart the scrape_cache TTL of a page that revalidated as unchanged, so a page
+    that keeps answering 304 is not expired after SCRAPE_CACHE_TTL. Best-effort, like
+    store_validated_page.
+    """
     try:
-        table = soup.find("section", id="quarters")
-        # table = soup.find("div", id="peers-table-placeholder")
-        if not table:
-            print(f"No table placeholder found for {stock_symbol}.")
-            return {"quarterly_result": []}
+        await scrape_cache_collection.update_one({"_id": url}, {"$set": {"stored_at": datetime.now(timezone.utc)}})
+    except PyMongoError as error:
+        logger.warning("Could not refresh %s in scrape_cache: %s", url, error)
 
-        # Find the table within the placeholder
-        data_table = table.find("table", class_="data-table")
-        if not data_table:
-            print(f"No data table found for {stock_symbol}.")
-            return {"quarterly_result": []}
 
-        # Extract headers
-        headers = []
-        header_row = data_table.find("tr")
-        if not header_row:
-            print(f"No header row found for {stock_symbol}.")
-            return {"quarterly_result": []}
+async def scrape_page(url: str, parser, stock_symbol: str, headers: dict = None, version: int = 1) -> dict:
+    """
+    Fetch a webpage and run parser(stock_symbol, body) on it in the parse process pool.
+    Parsed results are cached by URL; once expired they are revalidated with a
+    conditional GET and reused without parsing if the page has not changed.
 
-        for th in header_row.find_all("th"):
-            headers.append(th.get_text(strip=True))
+    Stored results are only reused for the same parser and version, so bump version
+    whenever a parser's output changes.
+    """
+    data = page_cache.get(url)
+    if data is not None:
+        return data
+
+    loop = asyncio.get_running_loop()
+    entry = validated_pages.get(url)
+    if entry is None:
+        entry = await load_validated_page(url, parser.__name__, version)
+    validators, data = entry
+
+    status, body, response_headers = await fetch_page(url, headers={**(headers or {}), **validators})
+    if status == 304 and data is not None:
+        validated_pages[url] = entry
+        await touch_validated_page(url)
+    else:
+        data = await loop.run_in_executor(parse_executor, parser, stock_symbol, body)
+        validators = {
+            request_header: response_headers[response_header]
+            for response_header, request_header in CONDITIONAL_HEADERS.items()
+            if response_header in response_headers
+        }
+        if validators:
+            validated_pages[url] = (validators, data)
+            await store_validated_page(url, parser.__name__, version, validators, data)
+    page_cache[url] = data
+    return data
 
-        if not headers:
-            print(f"No headers found for {stock_symbol}.")
-            return {"quarterly_result": []}
 
-        # Extract rows
-        rows = []
-        tbody = data_table.find("tbody")
-        if not tbody:
-            print(f"No tbody found for {stock_symbol}.")
-            return {"quarterly_result": []}
-
-        for tr in tbody.find_all("tr"):
-            cells = tr.find_all("td")
-            if len(cells) != len(headers):
-                print(f"Row mismatch for {stock_symbol}: {cells}")
-                continue
+def get_text(element: lxml.html.HtmlElement) -> str:
+    """
+    Return the stripped text of an element, like BeautifulSoup's get_text(strip=True).
+    """
+    # Most table cells are leaves like <td>1,234</td>: read their text directly
+    if not len(element):
+        return (element.text or "").strip()
+    return "".join(text.strip() for text in element.itertext())
 
-            # Map headers to cell values
-            row_data = {
-                headers[idx]: cell.get_text(strip=True)
-                for idx, cell in enumerate(cells)
-            }
-            rows.append(row_data)
 
-        if not rows:
-            print(f"No data rows found for {stock_symbol}.")
-            return {"quarterly_result": []}
+def index_sections(tree: lxml.html.HtmlElement) -> dict:
+    """
+    Map the id of every <section> on a page to its first section with that id,
+    collected in a single pass over the document.
+    """
+    sections = {}
+    for section in SECTIONS_WITH_ID(tree):
+        sections.setdefault(section.get("id"), section)
+    return sections
 
-        return {"quarterly_result": rows}
-    except Exception as e:
-        print(f"Error parsing peer comparison table for {stock_symbol}: {str(e)}")
-        return {"quarterly_result": []}
-    
-    
-def shareholding_table(stock_symbol: str, soup: BeautifulSoup):
-    try:
-        table = soup.find("section", id="shareholding")
-        # table = soup.find("div", id="peers-table-placeholder")
-        if not table:
-            print(f"No table placeholder found for {stock_symbol}.")
-            return {"shareholding_result": []}
 
-        # Find the table within the placeholder
-        data_table = table.find("table", class_="data-table")
-        if not data_table:
-            print(f"No data table found for {stock_symbol}.")
-            return {"shareholding_result": []}
+def stream_section(body: bytes, section_id: str):
+    """
+    Pull-parse a page and return its <section id=section_id> element as soon as it is
+    closed, clearing every other section on the way so only that subtree is kept.
+    Sections nested inside the target are left intact.
+    """
+    parser = etree.HTMLPullParser(events=("start", "end"), tag="section", encoding=HTML_ENCODING)
+    parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+    target = None
+
+    def read_events():
+        nonlocal target
+        for event, element in parser.read_events():
+            if event == "start":
+                if target is None and element.get("id") == section_id:
+                    target = element
+            elif element is target:
+                return element
+            elif target is None:
+                element.clear()
+        return None
 
-        # Extract headers
-        headers = []
-        header_row = data_table.find("tr")
-        if not header_row:
-            print(f"No header row found for {stock_symbol}.")
-            return {"shareholding_result": []}
+    for start in range(0, len(body), STREAM_CHUNK_SIZE):
+        parser.feed(body[start:start + STREAM_CHUNK_SIZE])
+        section = read_events()
+        if section is not None:
+            return section
+    parser.close()
+    return read_events()
 
-        for th in header_row.find_all("th"):
-            headers.append(th.get_text(strip=True))
 
-        if not headers:
-            print(f"No headers found for {stock_symbol}.")
-            return {"shareholding_result": []}
+def find_data_table(section: lxml.html.HtmlElement):
+    """
+    Return the first <table class="data-table"> inside a section, or None.
+    """
+    tables = DATA_TABLE(section)
+    return tables[0] if tables else None
 
-        # Extract rows
-        rows = []
-        tbody = data_table.find("tbody")
-        if not tbody:
-            print(f"No tbody found for {stock_symbol}.")
-            return {"shareholding_result": []}
-
-        for tr in tbody.find_all("tr"):
-            cells = tr.find_all("td")
-            if len(cells) != len(headers):
-                print(f"Row mismatch for {stock_symbol}: {cells}")
-                continue
 
-            # Map headers to cell values
-            row_data = {
-                headers[idx]: cell.get_text(strip=True)
-                for idx, cell in enumerate(cells)
-            }
-            rows.append(row_data)
+def find_documents(tree: lxml.html.HtmlElement, kind: str):
+    """
+    Return the <div class="documents {kind} flex-column"> list of the page, or None.
+    """
+    sections = DOCUMENTS_SECTION(tree, kind=kind)
+    return sections[0] if sections else None
 
-        if not rows:
-            print(f"shareholding_result No data rows found for {stock_symbol}.")
-            return {"shareholding_result": []}
 
-        return {"shareholding_result": rows}
-    except Exception as e:
-        print(f"Error parsing peer comparison table for {stock_symbol}: {str(e)}")
-        return {"shareholding_result": []}
-    
-def cashflow_table(stock_symbol: str, soup: BeautifulSoup):
-    try:
-        table = soup.find("section", id="cash-flow")
-        # table = soup.find("div", id="peers-table-placeholder")
-        if not table:
-            print(f"No table placeholder found for {stock_symbol}.")
-            return {"cashflow_result": []}
+def parse_ul_top_ratios(stock_symbol: str, tree: lxml.html.HtmlElement):
+    """
+    Parse the <ul> with id="top-ratios" from the page.
+    """
+    ul_element = tree.find('.//ul[@id="top-ratios"]')
+    if ul_element is None:
+        return None
 
-        # Find the table within the placeholder
-        data_table = table.find("table", class_="data-table")
-        if not data_table:
-            print(f"No data table found for {stock_symbol}.")
-            return {"cashflow_result": []}
+    names = RATIO_NAMES(ul_element)
+    values = RATIO_VALUES(ul_element)
+    items_dict = {get_text(name): get_text(value) for name, value in zip(names, values)}
 
-        # Extract headers
-        headers = []
-        header_row = data_table.find("tr")
-        if not header_row:
-            print(f"No header row found for {stock_symbol}.")
-            return {"cashflow_result": []}
+    return {"stock_symbol": stock_symbol, "stock_details": items_dict}
 
-        for th in header_row.find_all("th"):
-            headers.append(th.get_text(strip=True))
 
-        if not headers:
-            print(f"No headers found for {stock_symbol}.")
-            return {"cashflow_result": []}
+def parse_shareholder_table(stock_symbol: str, tree: lxml.html.HtmlElement):
+    """
+    Parse the shareholder table with id="quarterly-shp".
+    """
+    table = tree.find('.//div[@id="quarterly-shp"]')
+    if table is None:
+        return None
 
-        # Extract rows
-        rows = []
-        tbody = data_table.find("tbody")
-        if not tbody:
-            print(f"No tbody found for {stock_symbol}.")
-            return {"cashflow_result": []}
-
-        for tr in tbody.find_all("tr"):
-            cells = tr.find_all("td")
-            if len(cells) != len(headers):
-                print(f"Row mismatch for {stock_symbol}: {cells}")
-                continue
+    headers = tuple(th.text_content().strip() for th in table.find(".//thead").find(".//tr").iter("th"))
+    rows = [
+        dict(zip(headers, map(get_text, tr.iterchildren("td"))))
+        for tr in table.find(".//tbody").iterchildren("tr")
+    ]
 
-            # Map headers to cell values
-            row_data = {
-                headers[idx]: cell.get_text(strip=True)
-                for idx, cell in enumerate(cells)
-            }
-            rows.append(row_data)
+    return {"shareholder_data": rows}
 
-        if not rows:
-            print(f"cashflow_result No data rows found for {stock_symbol}.")
-            return {"cashflow_result": []}
 
-        return {"cashflow_result": rows}
+def parse_table_rows(stock_symbol: str, data_table: lxml.html.HtmlElement, key: str):
+    """
+    Parse a data table into rows keyed by its header row, returned as {key: rows}.
+    Rows whose cell count differs from the headers are skipped.
+    """
+    # Extract headers
+    header_row = data_table.find(".//tr")
+    if header_row is None:
+        logger.debug("No header row found for %s.", stock_symbol)
+        return {key: []}
+
+    headers = tuple(get_text(th) for th in header_row.iter("th"))
+    if not headers:
+        logger.debug("No headers found for %s.", stock_symbol)
+        return {key: []}
+
+    # Extract rows
+    rows = []
+    tbody = data_table.find(".//tbody")
+    if tbody is None:
+        logger.debug("No tbody found for %s.", stock_symbol)
+        return {key: []}
+
+    for tr in tbody.iterchildren("tr"):
+        cells = tr.findall("td")
+        if len(cells) != len(headers):
+            logger.debug("Row mismatch for %s: %s", stock_symbol, cells)
+            continue
+
+        # Map headers to cell values
+        row_data = dict(zip(headers, map(get_text, cells)))
+        rows.append(row_data)
+
+    if not rows:
+        logger.debug("No %s rows found for %s.", key, stock_symbol)
+        return {key: []}
+
+    return {key: rows}
+
+
+def parse_data_table(stock_symbol: str, table: Optional[lxml.html.HtmlElement], key: str):
+    """
+    Parse the data table of a page section, returned as {key: rows}.
+    """
+    try:
+        if table is None:
+            logger.debug("No table placeholder found for %s.", stock_symbol)
+            return {key: []}
+
+        # Find the table within the placeholder
+        data_table = find_data_table(table)
+        if data_table is None:
+            logger.debug("No data table found for %s.", stock_symbol)
+            return {key: []}
+
+        return parse_table_rows(stock_symbol, data_table, key)
     except Exception as e:
-        print(f"Error parsing peer comparison table for {stock_symbol}: {str(e)}")
-        return {"cashflow_result": []}
-    
+        logger.warning("Error parsing %s table for %s: %s", key, stock_symbol, e)
+        return {key: []}
+
+
+# Sections of a company page parsed by parse_data_table:
+# (company page field, section id, key of the parsed rows)
+DATA_TABLES = (
+    ("profit_loss_data", "profit-loss", "profit_loss"),
+    ("balance_sheet_data", "balance-sheet", "balance_sheet"),
+    ("quaterly_result_data", "quarters", "quarterly_result"),
+    ("shareholding_data", "shareholding", "shareholding_result"),
+    ("cashflow_data", "cash-flow", "cashflow_result"),
+)
 
-def ratios_table(stock_symbol: str, soup: BeautifulSoup):
+
+def ratios_table(stock_symbol: str, table: Optional[lxml.html.HtmlElement]):
     try:
-        table = soup.find("section", id="ratios")
-        if not table:
-            print(f"No ratios section found for {stock_symbol}.")
+        if table is None:
+            logger.debug("No ratios section found for %s.", stock_symbol)
             return {"ratios_result": []}
 
-        data_table = table.find("table", class_="data-table")
-        if not data_table:
-            print(f"No data table found for {stock_symbol}.")
+        data_table = find_data_table(table)
+        if data_table is None:
+            logger.debug("No data table found for %s.", stock_symbol)
             return {"ratios_result": []}
 
         # Extract headers
-        headers = []
-        header_row = data_table.find("thead").find("tr")
-        if not header_row:
-            print(f"No header row found for {stock_symbol}.")
+        header_row = data_table.find(".//thead").find(".//tr")
+        if header_row is None:
+            logger.debug("No header row found for %s.", stock_symbol)
             return {"ratios_result": []}
 
-        for th in header_row.find_all("th"):
-            headers.append(th.get_text(strip=True))
+        headers = tuple(get_text(th) for th in header_row.iter("th"))
 
         if not headers:
-            print(f"No headers found for {stock_symbol}.")
+            logger.debug("No headers found for %s.", stock_symbol)
             return {"ratios_result": []}
 
         # Extract rows
         rows = []
-        tbody = data_table.find("tbody")
-        if not tbody:
-            print(f"No tbody found for {stock_symbol}.")
+        tbody = data_table.find(".//tbody")
+        if tbody is None:
+            logger.debug("No tbody found for %s.", stock_symbol)
             return {"ratios_result": []}
 
-        for tr in tbody.find_all("tr"):
-            cells = tr.find_all("td")
+        for tr in tbody.iterchildren("tr"):
+            cells = tr.findall("td")
             if len(cells) == 0:
                 continue
 
-            row_label = cells[0].get_text(strip=True)  # First cell is the ratio name
-            row_data = {headers[idx]: cell.get_text(strip=True) for idx, cell in enumerate(cells)}
-            row_data["Ratio Name"] = row_label  # Add the ratio name separately
+            texts = [get_text(cell) for cell in cells]
+            row_data = dict(zip(headers, texts))
+            row_data["Ratio Name"] = texts[0]  # First cell is the ratio name
             rows.append(row_data)
 
         if not rows:
-            print(f"No data rows found for {stock_symbol}.")
+            logger.debug("No data rows found for %s.", stock_symbol)
             return {"ratios_result": []}
 
         return {"ratios_result": rows}
     except Exception as e:
-        print(f"Error parsing ratios table for {stock_symbol}: {str(e)}")
+        logger.warning("Error parsing ratios table for %s: %s", stock_symbol, e)
         return {"ratios_result": []}
 
-def parse_peer_comparison_table(stock_symbol: str, soup: BeautifulSoup):
+
+def parse_peer_comparison_table(stock_symbol: str, tree: lxml.html.HtmlElement):
     try:
         # Locate the table using its class name
-        data_table = soup.find("table", class_="data-table text-nowrap striped mark-visited no-scroll-right")
-        if not data_table:
-            print(f"No data table found for {stock_symbol}.")
-            return {"peer_comparison": []}
-
-        # Extract headers
-        headers = []
-        header_row = data_table.find("tr")
-        if not header_row:
-            print(f"No header row found for {stock_symbol}.")
-            return {"peer_comparison": []}
-
-        for th in header_row.find_all("th"):
-            # Extract column names
-            column_name = th.get_text(strip=True)
-            headers.append(column_name)
-
-        if not headers:
-            print(f"No headers found for {stock_symbol}.")
-            return {"peer_comparison": []}
-
-        # Extract rows
-        rows = []
-        tbody = data_table.find("tbody")
-        if not tbody:
-            print(f"No tbody found for {stock_symbol}.")
+        data_table = tree.find('.//table[@class="data-table text-nowrap striped mark-visited no-scroll-right"]')
+        if data_table is None:
+            logger.debug("No data table found for %s.", stock_symbol)
             return {"peer_comparison": []}
 
-        for tr in tbody.find_all("tr"):
-            cells = tr.find_all("td")
-            if len(cells) != len(headers):
-                print(f"Skipping row due to mismatch: {cells}")
-                continue
-
-            row_data = {headers[idx]: cell.get_text(strip=True) for idx, cell in enumerate(cells)}
-            rows.append(row_data)
-
-        if not rows:
-            print(f"No data rows found for {stock_symbol}.")
-            return {"peer_comparison": []}
-
-        return {"peer_comparison": rows}
-
+        return parse_table_rows(stock_symbol, data_table, "peer_comparison")
     except Exception as e:
-        print(f"Error parsing peer comparison table for {stock_symbol}: {str(e)}")
+        logger.warning("Error parsing peer comparison table for %s: %s", stock_symbol, e)
         return {"peer_comparison": []}
     
     
-def scrape_annual_reports(url):
-    """Scrape annual reports from the given URL."""
+def scrape_annual_reports(tree: lxml.html.HtmlElement):
+    """Scrape annual reports from the consolidated company page."""
     try:
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-        if response.status_code != 200:
-            print(f"[ERROR] Failed to fetch {url} - Status Code: {response.status_code}")
-            return []
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        reports_section = soup.find("div", class_="documents annual-reports flex-column")
-        if not reports_section:
-            print("[ERROR] No annual reports section found.")
+        anchors = ANNUAL_REPORT_LINKS(tree)
+        if not anchors:
+            logger.debug("No annual reports found.")
             return []
 
         report_links = []
-        for li in reports_section.find_all("li"):
-            a_tag = li.find("a")
-            if a_tag and a_tag.get("href"):
-                year_text = a_tag.text.strip()
-                year = next((word for word in year_text.split() if word.isdigit()), "Unknown Year")
-                link = a_tag["href"]
+        for a_tag in anchors:
+            year_text = a_tag.text_content().strip()
+            year = next((word for word in year_text.split() if word.isdigit()), "Unknown Year")
+            link = a_tag.get("href")
 
-                # Ensure absolute URL
-                if link.startswith("/"):
-                    link = f"https://www.bseindia.com{link}"
+            # Ensure absolute URL
+            if link.startswith("/"):
+                link = f"https://www.bseindia.com{link}"
 
-                report_links.append({"year": year, "url": link})
+            report_links.append({"year": year, "url": link})
 
         return report_links
 
     except Exception as e:
-        print(f"[EXCEPTION] {str(e)}")
+        logger.warning("Error parsing documents: %s", e)
         return []
 
 
-def scrape_credit_ratings(url):
-    """Scrape credit ratings from the given URL."""
+def scrape_credit_ratings(tree: lxml.html.HtmlElement):
+    """Scrape credit ratings from the consolidated company page."""
     try:
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-        if response.status_code != 200:
-            print(f"[ERROR] Failed to fetch {url} - Status Code: {response.status_code}")
-            return []
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        reports_section = soup.find("div", class_="documents credit-ratings flex-column")
-        if not reports_section:
-            print("[ERROR] No credit ratings section found.")
+        reports_section = find_documents(tree, "credit-ratings")
+        if reports_section is None:
+            logger.debug("No credit ratings section found.")
             return []
 
         report_links = []
-        for li in reports_section.find_all("li"):
-            a_tag = li.find("a")
-            date_tag = li.find("div", class_="ink-600 smaller")
+        for li in reports_section.iter("li"):
+            a_tag = li.find(".//a")
+            date_tag = li.find('.//div[@class="ink-600 smaller"]')
 
-            if a_tag and a_tag.get("href") and date_tag:
+            if a_tag is not None and a_tag.get("href") and date_tag is not None:
                 report_links.append({
-                    "date": date_tag.text.strip(),
-                    "url": a_tag["href"]
+                    "date": date_tag.text_content().strip(),
+                    "url": a_tag.get("href")
                 })
 
         return report_links
 
     except Exception as e:
-        print(f"[EXCEPTION] {str(e)}")
+        logger.warning("Error parsing documents: %s", e)
         return []
     
 
 
-def scrape_concalls(url):
-    response = requests.get(url)
-    if response.status_code != 200:
-        print("Failed to retrieve the page")
-        return []
-    
-    soup = BeautifulSoup(response.text, 'html.parser')
+def scrape_concalls(tree: lxml.html.HtmlElement):
     concalls = []
     
-    concall_section = soup.find('div', class_='documents concalls flex-column')
-    if not concall_section:
-        print("No concall section found")
+    concall_section = find_documents(tree, "concalls")
+    if concall_section is None:
+        logger.debug("No concall section found.")
         return []
     
-    for item in concall_section.find_all('li', class_='flex'):
-        date = item.find('div', class_='ink-600').text.strip()
-        
-        transcript = item.find('a', class_='concall-link', title="Raw Transcript")
-        transcript_url = transcript['href'] if transcript else None
+    for item in CONCALL_ITEMS(concall_section):
+        date = CONCALL_DATE(item)[0].text_content().strip()
+        links = CONCALL_LINKS(item)
         
-        notes_button = item.find('button', class_='concall-link')
-        notes_url = notes_button['data-url'] if notes_button else None
+        transcript = next((link for link in links if link.get("title") == "Raw Transcript"), None)
+        transcript_url = transcript.attrib['href'] if transcript is not None else None
         
-        ppt = None
-        for link in item.find_all('a', class_='concall-link'):
-            if 'PPT' in link.text:
-                ppt = link['href']
-                break
+        notes_button = CONCALL_NOTES(item)
+        notes_url = notes_button[0].attrib['data-url'] if notes_button else None
         
-        rec = None
-        for link in item.find_all('a', class_='concall-link'):
-            if 'mp3' in link['href']:
-                rec = link['href']
+        ppt = rec = None
+        for link in links:
+            href = link.get('href')
+            if ppt is None and 'PPT' in link.text_content():
+                ppt = href
+            if rec is None and href and 'mp3' in href:
+                rec = href
+            if ppt is not None and rec is not None:
                 break
         
         concalls.append({
@@ -586,107 +799,310 @@ def scrape_concalls(url):
     
     return concalls
 
-@app.post("/scrape-stock-data")
-async def scrape_shareholder_data(payload: StockList):
+def parse_company_page(stock_symbol: str, body: bytes) -> dict:
+    """
+    Parse every section of a company page. Runs in the parse process pool, so it
+    takes the raw page and returns plain dicts.
+    """
+    if not any(marker in body for marker in COMPANY_PAGE_MARKERS):
+        logger.debug("No company data found for %s.", stock_symbol)
+        return {
+            "details_data": None,
+            "shareholder_data": None,
+            **{field: {key: []} for field, _, key in DATA_TABLES},
+            "ratios_data": {"ratios_result": []},
+            "peer_comparision_data": {"peer_comparison": []},
+        }
 
-    stock_symbols = [
-        symbol.strip().upper() for symbol in payload.stock_symbols.split(",")
-    ]
+    tree = lxml.html.fromstring(body, parser=HTML_PARSER)
+    sections = index_sections(tree)
+    return {
+        "details_data": parse_ul_top_ratios(stock_symbol, tree),
+        "shareholder_data": parse_shareholder_table(stock_symbol, tree),
+        **{
+            field: parse_data_table(stock_symbol, sections.get(section_id), key)
+            for field, section_id, key in DATA_TABLES
+        },
+        "ratios_data": ratios_table(stock_symbol, sections.get("ratios")),
+        "peer_comparision_data": parse_peer_comparison_table(stock_symbol, tree),
+    }
+
+
+def parse_consolidated_page(stock_symbol: str, body: bytes) -> dict:
+    """
+    Parse the annual reports, credit ratings and concalls of a consolidated company page,
+    plus its warehouse id, which keys screener's per-company APIs. Only the documents
+    section is kept from the page.
+    """
+    match = WAREHOUSE_ID.search(body)
+    warehouse_id = match.group(1).decode() if match else None
+
+    section = stream_section(body, "documents")
+    if section is None:
+        logger.debug("No documents section found for %s.", stock_symbol)
+        return {"documents": EMPTY_DOCUMENTS, "warehouse_id": warehouse_id}
+    return {
+        "documents": {
+            "annual_reports": scrape_annual_reports(section),
+            "credit_ratings": scrape_credit_ratings(section),
+            "scrape_concalls": scrape_concalls(section),
+        },
+        "warehouse_id": warehouse_id,
+    }
+
+
+async def scrape_consolidated_page(stock_symbol: str) -> dict:
+    """
+    Scrape the consolidated page of a stock, with empty documents if it is unavailable.
+    """
+    url = f"https://www.screener.in/company/{stock_symbol}/consolidated/"
+    try:
+        return await scrape_page(url, parse_consolidated_page, stock_symbol, version=CONSOLIDATED_PAGE_VERSION)
+    except HTTPException as e:
+        logger.warning("%s", e.detail)
+        return {"documents": EMPTY_DOCUMENTS, "warehouse_id": None}
+
+
+async def save_stock_details(docs: List[dict]) -> dict:
+    """
+    Upsert scraped stocks by symbol in a single unordered bulk write. The documents
+    are built by the parsers here, so server-side validation is skipped.
+
+    Returns {symbol: error message} for the stocks the server rejected; the rest of
+    the batch is still saved.
+    """
+    # A symbol listed twice in one request must not race itself on the unique index
+    latest = {doc["stock_symbol"]: doc for doc in docs}
+    if not latest:
+        return {}
+    symbols = list(latest)
+    try:
+        await stock_details_collection.bulk_write(
+            [ReplaceOne({"stock_symbol": symbol}, doc, upsert=True) for symbol, doc in latest.items()],
+            ordered=False,
+            bypass_document_validation=True,
+        )
+    except BulkWriteError as e:
+        return {symbols[error["index"]]: error["errmsg"] for error in e.details["writeErrors"]}
+    return {}
+
+
+async def queue_stock_details(doc: dict) -> asyncio.Future:
+    """
+    Hand a scraped stock to the writer task, waiting if the queue is full. Returns a
+    future the writer resolves once the stock is saved, or fails with the save error.
+    """
+    if writer_task.done():
+        raise RuntimeError("Stock writer is not running.")
+    saved = asyncio.get_running_loop().create_future()
+    await write_queue.put((doc, saved))
+    return saved
+
+
+def has_stock_data(sections: dict) -> bool:
+    """
+    Whether a parsed company page has top ratios or a shareholder table, i.e. is
+    worth fetching the consolidated page and peers for.
+    """
+    return bool(sections["details_data"] or sections["shareholder_data"])
+
+
+def build_stock_document(stock_symbol: str, sections: dict, consolidated: dict, extra: dict) -> Optional[dict]:
+    """
+    Combine the parsed company page, the consolidated page's documents and any extra
+    section (the peer comparison) into one stock document, or None if the page has
+    neither top ratios nor a shareholder table.
+    """
+    if not has_stock_data(sections):
+        return None
+    details_data = sections["details_data"]
+    shareholder_data = sections["shareholder_data"]
+    return {
+        "stock_symbol": stock_symbol,
+        # A page may have only one of the two
+        **(details_data or {}),
+        **(shareholder_data or {}),
+        **sections["profit_loss_data"],
+        **sections["balance_sheet_data"],
+        **sections["quaterly_result_data"],
+        **sections["shareholding_data"],
+        **sections["cashflow_data"],
+        **sections["ratios_data"],
+        **extra,
+        **consolidated["documents"],
+    }
+
+
+async def save_stock_document(stock_symbol: str, document: Optional[dict]) -> dict:
+    """
+    Queue a built stock document for saving and return the scrape result for it.
+    """
+    if document is None:
+        return {"stock_symbol": stock_symbol, "message": "No shareholder table found."}
+    saved = await queue_stock_details(document)
+    await saved
+    return {"stock_symbol": stock_symbol, "message": "Data scraped and saved successfully."}
+
+
+async def write_stock_details():
+    """
+    Single writer for scraped stocks: takes up to WRITE_BATCH_SIZE stocks off the
+    queue, or whatever arrived within WRITE_FLUSH_INTERVAL, saves them with one
+    bulk write and resolves each stock's future with the outcome.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await write_queue.get()]
+        deadline = loop.time() + WRITE_FLUSH_INTERVAL
+        while len(batch) < WRITE_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(write_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
 
-    async def scrape_and_save(stock_symbol):
         try:
-            soup = fetch_page(f"https://www.screener.in/company/{stock_symbol}/")
-            details_data = parse_ul_top_ratios(stock_symbol, soup)
-            shareholder_data = parse_shareholder_table(stock_symbol, soup)
-            profit_loss_data = parse_profit_loss_table(stock_symbol, soup)
-            balance_sheet_data = parse_balance_sheet_table(stock_symbol, soup)
-            quaterly_result_data = parse_quaterly_result_table(stock_symbol, soup)
-            shareholding_data = shareholding_table(stock_symbol, soup)
-            cashflow_data = cashflow_table(stock_symbol, soup)
-            ratios_data = ratios_table(stock_symbol, soup)
-            peer_comparision_data = parse_peer_comparison_table(stock_symbol, soup)
-            
-            annual_reports_url = f"https://www.screener.in/company/{stock_symbol}/consolidated/"
-            annual_reports_data = scrape_annual_reports(annual_reports_url)
-            credit_ratings_data = scrape_credit_ratings(annual_reports_url)
-            scrape_concalls_data = scrape_concalls(annual_reports_url)
-            
-            if details_data or shareholder_data:
-                combined_data = {
-                    **details_data,
-                    **shareholder_data,
-                    **profit_loss_data,
-                    **balance_sheet_data,
-                    **quaterly_result_data,
-                    **peer_comparision_data,
-                    **shareholding_data,
-                    **cashflow_data,
-                    **ratios_data,
-                    "annual_reports": annual_reports_data,
-                    "credit_ratings": credit_ratings_data,
-                    "scrape_concalls": scrape_concalls_data,
-                }
-                stock_details_collection.insert_one(combined_data)
-                return {
-                    "stock_symbol": stock_symbol,
-                    "message": "Data scraped and saved successfully.",
-                }
-            return {
-                "stock_symbol": stock_symbol,
-                "message": "No shareholder table found.",
-            }
+            failed = await save_stock_details([doc for doc, _ in batch])
         except Exception as e:
-            return {"stock_symbol": stock_symbol, "error": str(e)}
+            logger.error("Failed to save %d stocks: %s", len(batch), e)
+            for _, saved in batch:
+                if not saved.done():
+                    saved.set_exception(e)
+        else:
+            for doc, saved in batch:
+                error = failed.get(doc["stock_symbol"])
+                if error is not None:
+                    logger.error("Failed to save %s: %s", doc["stock_symbol"], error)
+                if saved.done():
+                    continue
+                if error is None:
+                    saved.set_result(None)
+                else:
+                    saved.set_exception(RuntimeError(f"Failed to save stock: {error}"))
+        finally:
+            for _ in batch:
+                write_queue.task_done()
+
+
+@app.post("/scrape-stock-data", response_model=ScrapeResults, response_model_exclude_none=True)
+async def scrape_shareholder_data(payload: StockList):
 
-    results = []
-    for symbol in stock_symbols:
-        result = await scrape_and_save(symbol)
-        results.append(result)
-        await asyncio.sleep(
-            5
-        )  # Wait for 5 seconds before processing the next stock symbol
+    stock_symbols = parse_symbols(payload.stock_symbols)
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
+
+    async def scrape_and_save(stock_symbol):
+        async with semaphore:
+            try:
+                sections = await scrape_page(
+                    f"https://www.screener.in/company/{stock_symbol}/",
+                    parse_company_page,
+                    stock_symbol,
+                )
+                if not has_stock_data(sections):
+                    return await save_stock_document(stock_symbol, None)
+                consolidated = await scrape_consolidated_page(stock_symbol)
+
+                document = build_stock_document(stock_symbol, sections, consolidated, sections["peer_comparision_data"])
+                return await save_stock_document(stock_symbol, document)
+            except Exception as e:
+                return {"stock_symbol": stock_symbol, "error": str(e)}
+
+    # Scrape concurrently, at most MAX_CONCURRENT_SCRAPES stocks at a time
+    results = await asyncio.gather(*(scrape_and_save(symbol) for symbol in stock_symbols))
 
     return {"results": results}
 
 
-@app.get("/get-stock-symbols")
+def join_symbols(symbols: List[str]) -> bytes:
+    return "".join(", " + json.dumps(symbol)[1:-1] for symbol in symbols).encode()
+
+
+async def stream_symbols(first: str, rest: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """
+    Yield {"symbols": "A, B, ..."} as JSON in chunks of SYMBOL_BATCH_SIZE symbols.
+    """
+    yield b'{"symbols": ' + json.dumps(first)[:-1].encode()
+    batch = []
+    async for symbol in rest:
+        batch.append(symbol)
+        if len(batch) == SYMBOL_BATCH_SIZE:
+            yield join_symbols(batch)
+            batch = []
+    if batch:
+        yield join_symbols(batch)
+    yield b'"}'
+
+
+@app.get("/get-stock-symbols", response_model=SymbolList, response_model_exclude_none=True)
 async def get_stock_symbols():
     """
     Fetches all stock symbols from the MongoDB 'stocks' collection
-    and returns them as a comma-separated string.
+    and streams them back as a comma-separated string, sorted by symbol.
     """
     try:
-        # Fetch all documents from the collection
-        stocks = equity_list.find(
-            {}, {"_id": 0, "SYMBOL": 1}
-        )  # Only fetch 'Symbol' field
-
-        # Extract symbols
-        symbols = [stock["SYMBOL"] for stock in stocks if "SYMBOL" in stock]
-
-        if not symbols:
+        # Read the symbols off the SYMBOL index in batches and stream them out
+        # without holding the whole list or the joined string in memory. A $type
+        # filter has exact index bounds, so the query is covered by the index and
+        # never loads the documents themselves. Walking the index returns symbols
+        # in sorted order rather than insertion order; the sort makes that explicit
+        # and costs nothing on top of the index scan.
+        stocks = (
+            equity_list.find({"SYMBOL": {"$type": "string"}}, {"_id": 0, "SYMBOL": 1})
+            .sort("SYMBOL", 1)
+            .hint([("SYMBOL", 1)])
+            .batch_size(SYMBOL_BATCH_SIZE)
+        )
+        symbols = (stock["SYMBOL"] async for stock in stocks)
+
+        first = await anext(symbols, None)
+        if first is None:
             raise HTTPException(status_code=404, detail="No stock symbols found.")
 
-        # Return as comma-separated string
-        return {"symbols": ", ".join(symbols)}
+        return StreamingResponse(stream_symbols(first, symbols), media_type="application/json")
     except Exception as e:
         return {"error": str(e)}
 
 
-@app.get("/get-stock-symbols-limited")
-async def get_stock_symbols():
+@app.get("/get-stock-symbols-limited", response_model=SymbolList, response_model_exclude_none=True)
+async def get_stock_symbols(last_symbol: Optional[str] = None):
     """
-    Fetches stock symbols from the MongoDB 'stocks' collection,
-    returning records from 20 to 200 and returns them as a comma-separated string.
+    Fetches stock symbols from the equity list as a comma-separated string.
+
+    Without last_symbol, returns the SYMBOL_PAGE_SIZE documents after the first 2000
+    in natural (insertion) order, with no last_symbol to continue from.
+
+    To page through every symbol in symbol order, start with an empty last_symbol
+    (?last_symbol=) and pass each returned last_symbol back to get the next
+    SYMBOL_PAGE_SIZE symbols, read from the SYMBOL index instead of skipping documents.
     """
     try:
-        # Fetch documents starting from the 20th to the 200th (using skip and limit)
-        stocks = (
-            equity_list.find({}, {"_id": 0, "SYMBOL": 1}).skip(2000).limit(500)
-        )  # Skip 20 and limit to 180 records
-
-        # Extract symbols
-        symbols = [stock["SYMBOL"] for stock in stocks if "SYMBOL" in stock]
+        if last_symbol is not None:
+            stocks = (
+                equity_list.find({"SYMBOL": {"$gt": last_symbol}}, {"_id": 0, "SYMBOL": 1})
+                .sort("SYMBOL", 1)
+                .hint([("SYMBOL", 1)])
+                .limit(SYMBOL_PAGE_SIZE)
+            )
+            symbols = [stock["SYMBOL"] async for stock in stocks]
+            if not symbols:
+                raise HTTPException(status_code=404, detail="No stock symbols found.")
+            return {"symbols": ", ".join(symbols), "last_symbol": symbols[-1]}
+
+        # Skip 2000 documents, take the next 500 and push their symbols into one
+        # array on the server, so a single document comes back
+        stocks = await equity_list.aggregate(
+            [
+                {"$skip": 2000},
+                {"$limit": SYMBOL_PAGE_SIZE},
+                {"$match": {"SYMBOL": {"$exists": True}}},
+                {"$group": {"_id": None, "symbols": {"$push": "$SYMBOL"}}},
+            ]
+        )
+        result = await anext(stocks, None)
+        symbols = result["symbols"] if result else []
 
         if not symbols:
             raise HTTPException(status_code=404, detail="No stock symbols found.")
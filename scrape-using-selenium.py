@@ -2,27 +2,37 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+STOCK_SYMBOLS = ["TCS"]  # Scraped one after another in the same browser
 
 # Set up WebDriver (Make sure you have ChromeDriver installed)
 options = webdriver.ChromeOptions()
 options.add_argument("--headless")  # Run in headless mode
+options.add_argument("--disable-gpu")  # No GPU process to start
+options.add_argument("--no-sandbox")
+options.page_load_strategy = "eager"  # Return at DOMContentLoaded, not after every subresource
+options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})  # Skip images
 driver = webdriver.Chrome(options=options)
 
+# One browser serves every symbol, so Chrome starts once per run
 try:
-    url = "https://www.screener.in/company/TCS/consolidated/"
-    driver.get(url)
-
-    # Refresh the page
-    driver.refresh()
+    for stock_symbol in STOCK_SYMBOLS:
+        url = f"https://www.screener.in/company/{stock_symbol}/consolidated/"
+        driver.get(url)
 
-    # Wait for the "peers" section to appear
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.ID, "peers"))
-    )
+        # Wait for the "peers" table to be filled in
+        try:
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "#peers table"))
+            )
+        except TimeoutException:
+            print(f"No peers table loaded for {stock_symbol}.")
+            continue
 
-    # Extract Peer Comparison section
-    peers_section = driver.find_element(By.ID, "peers").text
-    print(peers_section)
+        # Extract Peer Comparison section
+        peers_section = driver.find_element(By.ID, "peers").text
+        print(peers_section)
 
 finally:
     driver.quit()
@@ -2,11 +2,18 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Only the peers section is read, so the rest of the page is never built into tags
+PEERS_STRAINER = SoupStrainer("section", id="peers")
+PEERS_OUTER_HTML = "document.getElementById('peers').outerHTML"
+
+STOCK_SYMBOLS = ["TCS"]  # Scraped one after another in the same browser
 
 def parse_peer_comparison_table(stock_symbol: str, html_content: str):
     try:
-        soup = BeautifulSoup(html_content, "html.parser")
+        soup = BeautifulSoup(html_content, "lxml", parse_only=PEERS_STRAINER)
         table = soup.find("section", id="peers")
         
         if not table:
@@ -18,7 +25,7 @@ def parse_peer_comparison_table(stock_symbol: str, html_content: str):
             print(f"No data table found for {stock_symbol}.")
             return {"peers": []}
 
-        headers = [th.get_text(strip=True) for th in data_table.find_all("th")]
+        headers = tuple(th.get_text(strip=True) for th in data_table.find_all("th"))
         if not headers:
             print(f"No headers found for {stock_symbol}.")
             return {"peers": []}
@@ -29,7 +36,7 @@ def parse_peer_comparison_table(stock_symbol: str, html_content: str):
             if len(cells) != len(headers):
                 print(f"Row mismatch for {stock_symbol}: {cells}")
                 continue
-            row_data = {headers[idx]: cell.get_text(strip=True) for idx, cell in enumerate(cells)}
+            row_data = dict(zip(headers, (cell.get_text(strip=True) for cell in cells)))
             rows.append(row_data)
 
         return {"peers": rows}
@@ -40,21 +47,34 @@ def parse_peer_comparison_table(stock_symbol: str, html_content: str):
 # Set up Selenium WebDriver
 options = webdriver.ChromeOptions()
 options.add_argument("--headless")
+options.add_argument("--disable-gpu")
+options.add_argument("--no-sandbox")
+options.page_load_strategy = "eager"  # Return at DOMContentLoaded, not after every subresource
+options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})  # Skip images
 driver = webdriver.Chrome(options=options)
 
+# One browser serves every symbol, so Chrome starts once per run
 try:
-    stock_symbol = "TCS"
-    url = f"https://www.screener.in/company/{stock_symbol}/consolidated/"
-    driver.get(url)
-    driver.refresh()
-    
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.ID, "peers"))
-    )
-    
-    html_content = driver.page_source
-    peer_data = parse_peer_comparison_table(stock_symbol, html_content)
-    print(peer_data)
+    for stock_symbol in STOCK_SYMBOLS:
+        url = f"https://www.screener.in/company/{stock_symbol}/consolidated/"
+        driver.get(url)
+
+        # The peers section is in the initial HTML; its table is filled in by script
+        try:
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "#peers table"))
+            )
+        except TimeoutException:
+            print(f"No peers table loaded for {stock_symbol}.")
+            continue
+
+        # Serialize only the peers section in the browser instead of the whole page_source
+        html_content = driver.execute_cdp_cmd(
+            "Runtime.evaluate",
+            {"expression": PEERS_OUTER_HTML, "returnByValue": True},
+        )["result"]["value"]
+        peer_data = parse_peer_comparison_table(stock_symbol, html_content)
+        print(peer_data)
 
 finally:
     driver.quit()